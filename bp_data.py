@@ -1,8 +1,18 @@
+import io
+import os
+import csv
 import json
+import zlib
+import struct
 import zipfile
 import re
+import logging
 import streamlit as st
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import unquote_plus
+
+logger = logging.getLogger(__name__)
 
 # ==========================================
 #  1. 檔案處理與 Session State
@@ -29,32 +39,207 @@ def render_global_sidebar():
         if uploaded_file:
             if uploaded_file.name != st.session_state.get('last_uploaded_name'):
                 with st.spinner("檔案解析中..."):
-                    data = _process_uploaded_file(uploaded_file)
-                    if data:
-                        st.session_state['blueprint_data'] = data
-                        st.session_state['current_file_name'] = uploaded_file.name
+                    bundle = _process_uploaded_file(uploaded_file)
+                    if bundle:
+                        st.session_state['blueprint_bundle'] = bundle
+                        st.session_state['bundle_file_name'] = uploaded_file.name
+                        member = next(iter(bundle))
+                        st.session_state['bundle_member_select'] = member
+                        set_blueprint_data(bundle[member], _bundle_label(uploaded_file.name, member, bundle))
                         st.session_state['last_uploaded_name'] = uploaded_file.name
+                        version_ids = {name: _save_to_history(data, _bundle_label(uploaded_file.name, name, bundle)) for name, data in bundle.items()}
+                        st.session_state['bundle_version_ids'] = version_ids
+                        st.session_state['current_version_id'] = version_ids[member]
                         st.rerun()
 
+        _render_bundle_picker()
+        _render_history_picker()
+
+# 歷史版本在背景 thread 寫入 SQLite (單一 worker，依序寫入)，不佔用上傳後的 rerun
+HISTORY_PICKER_LIMIT = 50
+_history_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bp-history")
+
+def _save_to_history(data, name):
+    """送出背景寫入，回傳 Future (完成後結果為 version_id)。"""
+    from bp_store import ingest_blueprint
+    future = _history_executor.submit(ingest_blueprint, data, name)
+    def _log_failure(f):
+        if f.exception(): logger.error("歷史版本儲存失敗: %s", name, exc_info=f.exception())
+    future.add_done_callback(_log_failure)
+    return future
+
+def _resolve_version_id(version):
+    """session 中的版本可能是 version_id 或背景寫入的 Future；尚未完成或失敗時回傳 None。"""
+    if not isinstance(version, Future): return version
+    if not version.done() or version.exception(): return None
+    return version.result()
+
+def _render_history_picker():
+    from bp_store import list_versions, load_version
+    pending = (st.session_state.get('bundle_version_ids') or {}).values()
+    if any(isinstance(f, Future) and f.done() and f.exception() for f in pending):
+        st.warning("歷史版本儲存失敗，詳見 server log")
+    try:
+        versions = list_versions(limit=HISTORY_PICKER_LIMIT)
+    except Exception:
+        logger.exception("讀取歷史版本失敗")
+        return
+    if not versions: return
+    with st.expander("🗄️ 歷史版本", expanded=False):
+        if len(versions) == HISTORY_PICKER_LIMIT: st.caption(f"僅列出最近 {HISTORY_PICKER_LIMIT} 個版本，完整清單請至「藍圖版本歷史」頁面")
+        labels = {v['id']: f"#{v['id']} {v['name']} ({v['created_at']})" for v in versions}
+        selected = st.selectbox("選擇版本", list(labels.keys()), format_func=lambda x: labels[x], key="history_version_select")
+        if st.button("📂 開啟此版本", use_container_width=True) and selected != _resolve_version_id(st.session_state.get('current_version_id')):
+            data = load_version(selected)
+            if data:
+                set_blueprint_data(data, labels[selected])
+                st.session_state['current_version_id'] = selected
+                st.rerun()
+
+def _bundle_label(file_name, member, bundle):
+    return file_name if len(bundle) == 1 else f"{file_name} / {member}"
+
+def _select_bundle_member():
+    bundle = st.session_state.get('blueprint_bundle') or {}
+    member = st.session_state.get('bundle_member_select')
+    if member in bundle:
+        set_blueprint_data(bundle[member], _bundle_label(st.session_state.get('bundle_file_name', ''), member, bundle))
+        st.session_state['current_version_id'] = (st.session_state.get('bundle_version_ids') or {}).get(member)
+
+def _render_bundle_picker():
+    bundle = st.session_state.get('blueprint_bundle') or {}
+    if len(bundle) < 2: return
+    st.selectbox(f"📦 Bundle 內的 Blueprint ({len(bundle)})", list(bundle.keys()), key="bundle_member_select", on_change=_select_bundle_member)
+
 def _process_uploaded_file(uploaded_file):
+    """
+    解析上傳檔案，回傳 {member 名稱: blueprint dict}。
+    - json：單一 blueprint
+    - zip：bundle 內所有 blueprint json (依 central directory 挑選，平行解壓後依序解析)
+    """
     try:
         filename = uploaded_file.name
-        if filename.endswith('.zip'):
-            with zipfile.ZipFile(uploaded_file) as z:
-                target = next((f for f in z.namelist() if f.lower() == 'blueprint.json'), None)
-                if target:
-                    with z.open(target) as f:
-                        return json.load(f)
-        elif filename.endswith('.json'):
+        if filename.lower().endswith('.zip'):
+            with _get_buffer(uploaded_file) as buf:
+                bundle = load_blueprint_bundle(buf)
+            if not bundle: st.sidebar.error("Zip 內找不到 blueprint json")
+            return bundle
+        elif filename.lower().endswith('.json'):
             uploaded_file.seek(0)
-            return json.load(uploaded_file)
+            return {os.path.basename(filename): json.load(uploaded_file)}
     except Exception as e:
         st.sidebar.error(f"讀取失敗: {e}")
     return None
 
+def _get_buffer(uploaded_file):
+    # UploadedFile 是 BytesIO，getbuffer() 直接取得底層記憶體 (不複製)
+    if hasattr(uploaded_file, 'getbuffer'): return uploaded_file.getbuffer()
+    uploaded_file.seek(0)
+    return memoryview(uploaded_file.read())
+
+# --- Zip Bundle (直接在 memoryview 上讀 central directory) ---
+_EOCD = struct.Struct('<4s4H2LH')           # End of central directory
+_CENTRAL = struct.Struct('<4s6H3L5H2L')     # Central directory file header
+_LOCAL = struct.Struct('<4s5H3L2H')         # Local file header
+_ZIP_STORED, _ZIP_DEFLATED = 0, 8
+
+def _is_blueprint_member(name):
+    lower = name.lower()
+    base = lower.rsplit('/', 1)[-1]
+    if lower.endswith('/') or lower.startswith('__macosx/') or base.startswith('.'): return False
+    return base.endswith('.json') and 'blueprint' in base
+
+def _is_blueprint_content(data):
+    # 檔名符合的 json 不一定是藍圖 (例如 blueprint_schema.json)，以內容再確認一次
+    return isinstance(data, dict) and ('subComponents' in data or 'uuid' in data)
+
+def _read_central_directory(buf):
+    """
+    只讀 central directory，回傳 [(name, method, flags, crc, comp_size, local_offset)]。
+    Zip64 或格式不符時回傳 None，由 zipfile 接手。
+    """
+    tail_start = max(0, len(buf) - (_EOCD.size + 0xFFFF))
+    pos = buf[tail_start:].tobytes().rfind(b'PK\x05\x06')
+    if pos < 0: return None
+    _, _, _, _, total, cd_size, cd_offset, _ = _EOCD.unpack_from(buf, tail_start + pos)
+    if total == 0xFFFF or cd_offset == 0xFFFFFFFF: return None
+
+    members, offset = [], cd_offset
+    for _ in range(total):
+        fields = _CENTRAL.unpack_from(buf, offset)
+        if fields[0] != b'PK\x01\x02': return None
+        flags, method, crc, comp_size = fields[3], fields[4], fields[7], fields[8]
+        name_len, extra_len, comment_len, local_offset = fields[10], fields[11], fields[12], fields[16]
+        if comp_size == 0xFFFFFFFF or local_offset == 0xFFFFFFFF: return None
+        raw_name = buf[offset + _CENTRAL.size: offset + _CENTRAL.size + name_len].tobytes()
+        name = raw_name.decode('utf-8' if flags & 0x800 else 'cp437')
+        members.append((name, method, flags, crc, comp_size, local_offset))
+        offset += _CENTRAL.size + name_len + extra_len + comment_len
+    return members
+
+def _inflate_member(buf, member):
+    name, method, flags, crc, comp_size, local_offset = member
+    if flags & 0x1: raise ValueError(f"{name} 已加密，無法讀取")
+    fields = _LOCAL.unpack_from(buf, local_offset)
+    data_start = local_offset + _LOCAL.size + fields[9] + fields[10]
+    payload = buf[data_start: data_start + comp_size]  # memoryview 切片，不複製
+    if method == _ZIP_DEFLATED: raw = zlib.decompress(payload, -15)
+    elif method == _ZIP_STORED: raw = payload.tobytes()
+    else: raise NotImplementedError(method)
+    if zlib.crc32(raw) != crc: raise ValueError(f"{name} CRC 檢查失敗")
+    return raw
+
+def _load_bundle_with_zipfile(buf):
+    with zipfile.ZipFile(io.BytesIO(buf)) as z:
+        names = [n for n in z.namelist() if _is_blueprint_member(n)]
+        return {n: json.loads(z.read(n)) for n in names}
+
+def load_blueprint_bundle(buf, max_workers=None):
+    """
+    從 zip 的記憶體 buffer 解出所有 blueprint。
+    只依 central directory 挑選 member，各 member 以 thread 平行解壓
+    (zlib 解壓會釋放 GIL，且 thread 可共用同一個 memoryview，不需複製資料)；
+    json 解析受 GIL 限制無法平行 (改用 process 需把解析結果 pickle 傳回，比直接解析更慢)，依序進行。
+    解析後內容不是藍圖 (沒有 subComponents / uuid) 的 json 會被略過。
+    根目錄的 blueprint.json 排在第一個，其餘依路徑排序。
+    """
+    buf = memoryview(buf)
+    members = _read_central_directory(buf)
+    if members is None or any(m[1] not in (_ZIP_STORED, _ZIP_DEFLATED) for m in members if _is_blueprint_member(m[0])):
+        bundle = _load_bundle_with_zipfile(buf)
+    else:
+        targets = [m for m in members if _is_blueprint_member(m[0])]
+        if len(targets) <= 1:
+            raws = [_inflate_member(buf, m) for m in targets]
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers or min(len(targets), os.cpu_count() or 1)) as pool:
+                raws = list(pool.map(lambda m: _inflate_member(buf, m), targets))
+        bundle = {m[0]: json.loads(raw) for m, raw in zip(targets, raws)}
+    bundle = {n: data for n, data in bundle.items() if _is_blueprint_content(data)}
+    ordered = sorted(bundle, key=lambda n: (n.lower() != 'blueprint.json', n.lower()))
+    return {n: bundle[n] for n in ordered}
+
+def set_blueprint_data(data, file_name):
+    st.session_state['blueprint_data'] = data
+    st.session_state['current_file_name'] = file_name
+    st.session_state['blueprint_rev'] = st.session_state.get('blueprint_rev', 0) + 1
+
 def get_blueprint_data():
     return st.session_state.get('blueprint_data')
 
+def get_derived(key, builder):
+    """
+    以目前藍圖為基準的 session 快取：builder(blueprint_data) 只在換檔後重算一次，
+    之後的 rerun (輸入、篩選) 都直接取用，不再走訪整份藍圖。
+    """
+    rev = st.session_state.get('blueprint_rev', 0)
+    cache = st.session_state.setdefault('_derived_cache', {})
+    entry = cache.get(key)
+    if entry is None or entry[0] != rev:
+        entry = (rev, builder(get_blueprint_data()))
+        cache[key] = entry
+    return entry[1]
+
 # ==========================================
 #  2. 共用工具函式
 # ==========================================
@@ -63,7 +248,8 @@ def clean_title(title):
     return title.replace('{{', '').replace('}}', '')
 
 def get_node_info(comp):
-    uuid = comp.get("uuid", str(hash(str(comp))))
+    # 沒有 uuid 時以物件 id 當作暫時識別 (避免對整個子樹 str() 後再 hash)
+    uuid = comp.get("uuid") or f"auto-{id(comp)}"
     name = comp.get("name", "Unknown")
     raw_title = comp.get("parameters", {}).get("title")
     if not raw_title: raw_title = comp.get("title")
@@ -72,6 +258,41 @@ def get_node_info(comp):
     label = title if title else name
     return {"uuid": uuid, "name": name, "title": title, "label": label, "eventId": event_id}
 
+def iter_node_records(data):
+    """
+    非遞迴 (pre-order) 走訪藍圖，逐筆產生埋點表的 row。
+    埋點管理頁面與匯出共用此產生器，兩邊內容保證一致。
+    """
+    if not data: return
+    stack = [(data, "")]
+    while stack:
+        node, path = stack.pop()
+        if not isinstance(node, dict): continue
+        info = get_node_info(node)
+        current_path = f"{path} > {info['label']}" if path else info['label']
+        for sub in reversed(node.get('subComponents', []) + node.get('pages', [])):
+            stack.append((sub, current_path))
+        if info['name'] in ["Unknown"]: continue
+        yield {
+            "Path": current_path,
+            "Component": info['name'],
+            "Title": info['title'],
+            "Event ID": info['eventId'],
+            "UUID": info['uuid'],
+            "Has ID": bool(info['eventId'])
+        }
+
+def filter_node_records(records, filter_type=None, filter_status="全部", ref_names=None):
+    """依類型 / 埋點狀態篩選；有 ref_names (貼上的 Event JSON) 時加上 Sync 欄位。"""
+    filter_type = set(filter_type) if filter_type else None
+    for row in records:
+        if filter_type and row['Component'] not in filter_type: continue
+        if filter_status == "有埋點" and not row['Has ID']: continue
+        if filter_status == "無埋點" and row['Has ID']: continue
+        if ref_names is not None:
+            row = dict(row, Sync="🟢" if row['Event ID'] in ref_names else ("🔴" if row['Event ID'] else "⚪"))
+        yield row
+
 def find_root_component(components, target_uuid="20000001"):
     for comp in components:
         if comp.get("uuid") == target_uuid: return comp
@@ -176,30 +397,204 @@ def parse_blueprint_for_deeplink(data):
     recursive_find_params(data)
     return known_pages, param_defs
 
+# ==========================================
+#  3.1 Deep Link 反解析 (批次解碼連結 Log)
+# ==========================================
+DEEPLINK_BASE_URL = "https://www.cmoney.tw/app/"
+DEEPLINK_RESOLVED_COLUMNS = ["URL", "Pages", "Params", "Issues", "Valid"]
+
+def build_deeplink_lookup(known_pages, param_defs):
+    """
+    將 known_pages / param_defs 預先攤平成查表用的 dict，
+    反解析時只做 dict 查詢，不再走訪巢狀結構。
+    """
+    page_names = {u: p.get('name', u) for u, p in known_pages.items()}
+    param_labels = {k: d.get('label', k) for k, d in param_defs.items()}
+    param_options = {k: d['options'] for k, d in param_defs.items() if d.get('options')}
+    return page_names, param_labels, param_options
+
+def resolve_deep_link(url, lookup):
+    """反解析單一 Deep Link，回傳可直接放入 DataFrame 的 row。"""
+    page_names, param_labels, param_options = lookup
+    query = url.partition('?')[2]
+    uuids, params, issues = [], [], []
+    for pair in query.split('&'):
+        if not pair: continue
+        key, _, value = pair.partition('=')
+        if '%' in value or '+' in value: value = unquote_plus(value)
+        if key == 'uuids': uuids = [u for u in value.split(',') if u]
+        else: params.append((key, value))
+
+    if not uuids: issues.append("缺少 uuids")
+    pages = []
+    for u in uuids:
+        name = page_names.get(u)
+        if name is None:
+            issues.append(f"未知 UUID: {u}")
+            name = f"Unknown ({u})"
+        pages.append(name)
+
+    readable = []
+    for key, value in params:
+        label = param_labels.get(key, key)
+        options = param_options.get(key)
+        if options is not None:
+            meaning = options.get(value)
+            if meaning is None:
+                issues.append(f"{label} 索引超出範圍: {value}")
+                meaning = value
+            readable.append(f"{label}={meaning}")
+        else:
+            readable.append(f"{label}={value}")
+
+    return {
+        "URL": url,
+        "Pages": " > ".join(pages),
+        "Params": "; ".join(readable),
+        "Issues": "; ".join(issues),
+        "Valid": not issues
+    }
+
+def _resolve_chunk(urls, lookup=None):
+    lookup = lookup or _worker_lookup
+    return [resolve_deep_link(u, lookup) for u in urls]
+
+_worker_lookup = None
+def _init_resolver_worker(lookup):
+    global _worker_lookup
+    _worker_lookup = lookup
+
+def iter_csv_urls(lines):
+    """CSV 格式的 log：每列取第一個含 :// 的欄位當作連結，標題列與沒有連結的列略過。"""
+    for row in csv.reader(lines):
+        url = next((cell.strip() for cell in row if '://' in cell), None)
+        if url: yield url
+
+def _iter_chunks(iterable, chunk_size):
+    chunk = []
+    for line in iterable:
+        line = line.strip()
+        if not line: continue
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk: yield chunk
+
+def resolve_deep_links(urls, known_pages, param_defs, chunk_size=50000, workers=1):
+    """
+    批次反解析 Deep Link，以 chunk 為單位串流輸出 (generator)。
+    - urls: 任意可迭代的連結 (list、檔案物件皆可，不會一次讀入)
+    - workers > 1 時以多個 process 平行處理，輸出順序與輸入一致
+    """
+    lookup = build_deeplink_lookup(known_pages, param_defs)
+    chunks = _iter_chunks(urls, chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            yield _resolve_chunk(chunk, lookup)
+        return
+
+    # 限制同時在途的 chunk 數量，避免整份 log 被一次送進 executor
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_resolver_worker, initargs=(lookup,)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_resolve_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
 # ==========================================
 #  4. App 架構 - ECharts 專用轉換 (New!)
 # ==========================================
 
-def get_echarts_tree_data(data, root_uuid="20000001", show_event_id=True, initial_depth=2):
+LAYOUT_COMPONENT_NAMES = ["靜態容器", "垂直捲動容器", "水平捲動容器", "底部分頁容器", "分頁容器", "頁籤分頁容器"]
+
+def _iter_children(node):
+    for child in (node.get('subComponents') or []) + (node.get('pages') or []):
+        if isinstance(child, dict): yield child
+
+def _find_node(node, target_uuid):
+    if node.get('uuid') == target_uuid: return node
+    for child in _iter_children(node):
+        res = _find_node(child, target_uuid)
+        if res: return res
+    return None
+
+def _is_hidden_layout(component, root_uuid):
+    """沒有標題、也沒有埋點的排版容器不顯示，子節點直接提昇 (穿透)。"""
+    if component.get('uuid') == root_uuid: return False
+    if component.get('name') not in LAYOUT_COMPONENT_NAMES: return False
+    if component.get('eventId'): return False
+    raw_title = (component.get('parameters') or {}).get('title') or component.get('title')
+    return not clean_title(raw_title)
+
+def compute_subtree_stats(data, root_uuid="20000001"):
+    """
+    以 post-order (非遞迴) 走訪一次，預先算好架構圖需要的統計，深度以「顯示深度」計算
+    (被穿透的排版容器不佔層級，與 get_echarts_tree_data 一致)。
+    - nodes: id(component) -> {visible, descendants (可見子孫數), fanout (可見子節點數), height}
+    - depth_hist: 各顯示深度的可見節點數
+    """
+    start_node = _find_node(data, root_uuid) if data else None
+    if not start_node: return None
+
+    nodes = {}
+    depth_hist = defaultdict(int)
+    stack = [(start_node, 0, False)]
+    while stack:
+        node, depth, visited = stack.pop()
+        hidden = _is_hidden_layout(node, root_uuid)
+        if not visited:
+            if not hidden: depth_hist[depth] += 1
+            stack.append((node, depth, True))
+            next_depth = depth if hidden else depth + 1
+            for child in _iter_children(node):
+                stack.append((child, next_depth, False))
+            continue
+
+        descendants, fanout, height = 0, 0, 0
+        for child in _iter_children(node):
+            cs = nodes[id(child)]
+            descendants += cs['descendants'] + cs['visible']
+            fanout += 1 if cs['visible'] else cs['fanout']
+            height = max(height, cs['height'] + cs['visible'])
+        nodes[id(node)] = {"visible": 0 if hidden else 1, "descendants": descendants, "fanout": fanout, "height": height}
+
+    hist = [depth_hist[d] for d in range(max(depth_hist) + 1)] if depth_hist else []
+    return {
+        "nodes": nodes,
+        "depth_hist": hist,
+        "total": sum(hist),
+        "max_fanout": max((n['fanout'] for n in nodes.values() if n['visible']), default=0)
+    }
+
+def pick_depth_for_budget(depth_hist, node_budget, min_depth=1):
+    """
+    回傳可見節點數不超過 node_budget 的最深層級。
+    展開到第 d 層時，畫面上會出現深度 0..d 的節點 (第 d 層為收合狀態)。
+    """
+    visible, best = 0, min_depth
+    for depth, count in enumerate(depth_hist):
+        visible += count
+        if visible > node_budget: break
+        best = max(depth, min_depth)
+    return best
+
+def get_echarts_tree_data(data, root_uuid="20000001", show_event_id=True, initial_depth=2, max_depth=None, subtree_stats=None):
     """
     將 Blueprint 轉換為 ECharts 遞迴 JSON 格式。
     - name: 顯示名稱
     - value: Event ID (用於 tooltip)
     - children: 子節點列表
     - collapsed: 是否收合 (根據深度決定)
+    - descendants: 可見子孫數 (需傳入 subtree_stats)
+    - max_depth: 超過此深度的子樹不轉換 (剪枝)，節點以 "+N" 標示被略過的數量
     """
 
-    def _find_node(node, target_uuid):
-        if node.get('uuid') == target_uuid: return node
-        children = (node.get('subComponents') or []) + (node.get('pages') or [])
-        for child in children:
-            if isinstance(child, dict):
-                res = _find_node(child, target_uuid)
-                if res: return res
-        return None
-
     start_node = _find_node(data, root_uuid)
     if not start_node: return None
+    stats_nodes = subtree_stats["nodes"] if subtree_stats else {}
 
     def _transform(component, current_depth):
         info = get_node_info(component)
@@ -211,9 +606,7 @@ def get_echarts_tree_data(data, root_uuid="20000001", show_event_id=True, initia
         if len(display_label) > 15:
             display_label = display_label[:12] + "..."
             
-        is_layout = info["name"] in ["靜態容器", "垂直捲動容器", "水平捲動容器", "底部分頁容器", "分頁容器", "頁籤分頁容器"]
-        should_hide = is_layout and (not info["title"]) and (not info["eventId"])
-        if my_id == root_uuid: should_hide = False
+        should_hide = _is_hidden_layout(component, root_uuid)
 
         # 如果此節點要隱藏，則直接回傳其「子節點的轉換結果」
         # 但 ECharts 是樹狀結構，如果父節點消失，子節點要掛在哪？
@@ -223,12 +616,15 @@ def get_echarts_tree_data(data, root_uuid="20000001", show_event_id=True, initia
         # 為了結構清晰，我們還是做「穿透」處理：回傳 list of children nodes
         
         children_nodes = []
-        raw_children = (component.get('subComponents') or []) + (component.get('pages') or [])
-        
+        stats = stats_nodes.get(id(component))
+        descendants = stats["descendants"] if stats else None
+        # 剪枝：超過 max_depth 的子樹不會顯示，直接不走訪
+        pruned = max_depth is not None and not should_hide and current_depth >= max_depth
+
         # 遞迴處理子節點
         next_depth = current_depth + 1 if not should_hide else current_depth
-        for child in raw_children:
-            if isinstance(child, dict):
+        if not pruned:
+            for child in _iter_children(component):
                 res = _transform(child, next_depth)
                 if isinstance(res, list): # 子節點是隱藏節點，回傳了它的孩子們
                     children_nodes.extend(res)
@@ -239,6 +635,10 @@ def get_echarts_tree_data(data, root_uuid="20000001", show_event_id=True, initia
         if should_hide:
             return children_nodes
 
+        collapsed = current_depth >= initial_depth # 初始展開深度
+        if descendants and (pruned or collapsed):
+            display_label = f"{display_label} (+{descendants})"
+
         # 樣式設定
         item_style = {
             "color": "#fff", # 白底
@@ -255,6 +655,8 @@ def get_echarts_tree_data(data, root_uuid="20000001", show_event_id=True, initia
             item_style["borderColor"] = "#2E7D32" # 綠色 (有埋點)
             item_style["borderWidth"] = 2
             item_style["color"] = "#E8F5E9" # 淺綠底
+        if pruned and descendants:
+            item_style["borderType"] = "dashed" # 子樹已剪枝
         
         node_data = {
             "name": display_label,
@@ -263,8 +665,10 @@ def get_echarts_tree_data(data, root_uuid="20000001", show_event_id=True, initia
             "itemStyle": item_style,
             "symbolSize": [120, 30] if len(display_label) < 8 else [160, 30], # 矩形大小
             "symbol": "roundRect", # 圓角矩形
-            "collapsed": current_depth >= initial_depth # 初始展開深度
+            "collapsed": collapsed
         }
+        if descendants is not None:
+            node_data["descendants"] = descendants
         
         if children_nodes:
             node_data["children"] = children_nodes
@@ -0,0 +1,169 @@
+import io
+import os
+import csv
+import time
+import tempfile
+from itertools import islice
+
+from bp_data import analyze_blueprint_content
+
+# 選用套件：沒有安裝時對應格式不提供
+try:
+    from openpyxl import Workbook
+    HAS_OPENPYXL = True
+except ImportError:
+    HAS_OPENPYXL = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# ==========================================
+#  串流匯出 (CSV / Excel / Parquet)
+# ==========================================
+# rows 為 dict (與頁面表格共用同一個產生器，例如 bp_data.filter_node_records)，
+# 以固定大小的 chunk 寫入，不先組出完整 DataFrame。
+
+DEFAULT_CHUNK_SIZE = 5000
+# Parquet 欄位型別：這些欄位為 bool，其餘一律存成字串 (不依資料推斷，避免前幾個 chunk 全是空值時型別推錯)
+BOOL_COLUMNS = {"Valid", "Has ID", "Explicit Columns"}
+SOURCE_COLUMNS = ["Group", "Card", "Source Type", "Source ID", "Explicit Columns", "Fields"]
+
+EXPORT_FORMATS = {
+    "csv": {"label": "CSV", "ext": "csv", "mime": "text/csv"},
+    "xlsx": {"label": "Excel", "ext": "xlsx", "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"},
+    "parquet": {"label": "Parquet", "ext": "parquet", "mime": "application/octet-stream"},
+}
+
+def available_formats():
+    formats = ["csv"]
+    if HAS_OPENPYXL: formats.append("xlsx")
+    if HAS_PYARROW: formats.append("parquet")
+    return formats
+
+def iter_source_rows(data):
+    """資料源報表 (analyze_blueprint_content 的結果) 逐筆轉成 row。"""
+    results, _ = analyze_blueprint_content(data)
+    for item in results:
+        yield {
+            "Group": item.get('group', ''),
+            "Card": item.get('display_name', ''),
+            "Source Type": item.get('source_type', ''),
+            "Source ID": str(item.get('source_id', '')),
+            "Explicit Columns": bool(item.get('has_explicit_columns')),
+            "Fields": "; ".join(item.get('fields_info') or []),
+        }
+
+def iter_chunks(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk: return
+        yield chunk
+
+# --- Writers：rows 為 list (欄位順序同 columns)，皆寫入 binary file-like，記憶體只保留一個 chunk ---
+def write_csv(rows, columns, fh, chunk_size=DEFAULT_CHUNK_SIZE):
+    fh.write('\ufeff'.encode('utf-8'))  # Excel 開啟中文不亂碼
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for chunk in iter_chunks(rows, chunk_size):
+        writer.writerows(chunk)
+        fh.write(buf.getvalue().encode('utf-8'))
+        buf.seek(0)
+        buf.truncate()
+    fh.write(buf.getvalue().encode('utf-8'))
+
+def write_xlsx(rows, columns, fh, chunk_size=DEFAULT_CHUNK_SIZE, sheet_name="Sheet1"):
+    if not HAS_OPENPYXL: raise ImportError("需要安裝 openpyxl 才能匯出 Excel")
+    wb = Workbook(write_only=True)  # write_only 模式逐列寫出，不保留整張表
+    ws = wb.create_sheet(sheet_name)
+    ws.append(columns)
+    for chunk in iter_chunks(rows, chunk_size):
+        for row in chunk: ws.append(row)
+    wb.save(fh)
+
+def parquet_schema(columns):
+    return pa.schema([(col, pa.bool_() if col in BOOL_COLUMNS else pa.string()) for col in columns])
+
+def write_parquet(rows, columns, fh, chunk_size=DEFAULT_CHUNK_SIZE):
+    if not HAS_PYARROW: raise ImportError("需要安裝 pyarrow 才能匯出 Parquet")
+    schema = parquet_schema(columns)
+    casts = [bool if col in BOOL_COLUMNS else str for col in columns]
+    with pq.ParquetWriter(fh, schema) as writer:
+        for chunk in iter_chunks(rows, chunk_size):
+            # 每個 chunk 寫成一個 row group；None 保留為 null，其餘依 schema 轉型 (int / str 混用的 ID 一律轉字串)
+            arrays = [[None if row[i] is None else cast(row[i]) for row in chunk] for i, cast in enumerate(casts)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+WRITERS = {"csv": write_csv, "xlsx": write_xlsx, "parquet": write_parquet}
+
+def write_rows(rows, columns, fmt, fh, chunk_size=DEFAULT_CHUNK_SIZE):
+    """將 dict rows 依 columns 取值後，以指定格式串流寫入 fh。"""
+    values = ([row.get(col) for col in columns] for row in rows)
+    WRITERS[fmt](values, columns, fh, chunk_size=chunk_size)
+
+class DownloadFile(io.BufferedReader):
+    """
+    交給 st.download_button(data=callable) 的檔案物件。
+    Streamlit 讀完整個檔案後即自動關閉；delete=True 時關閉後一併刪除檔案。
+    """
+    def __init__(self, path, delete=False):
+        super().__init__(io.FileIO(path, 'rb'))
+        self.path = path
+        self.delete = delete
+
+    def read(self, size=-1):
+        data = super().read(size)
+        if size is None or size < 0: self.close()
+        return data
+
+    def close(self):
+        super().close()
+        if self.delete and os.path.exists(self.path): os.remove(self.path)
+
+# --- 暫存檔集中管理：匯出與反解析的檔案都放在 EXPORT_DIR，依修改時間定期清除 ---
+EXPORT_DIR = os.environ.get("BP_EXPORT_DIR", os.path.join(tempfile.gettempdir(), "bp_data_exports"))
+EXPORT_MAX_AGE_S = 6 * 60 * 60
+_CLEANUP_INTERVAL_S = 10 * 60
+_last_cleanup = 0.0
+
+def cleanup_export_dir(max_age_s=EXPORT_MAX_AGE_S):
+    """刪除 EXPORT_DIR 中超過 max_age_s 秒未修改的檔案 (session 結束後留下的檔案)，回傳刪除數量。"""
+    if not os.path.isdir(EXPORT_DIR): return 0
+    removed, cutoff = 0, time.time() - max_age_s
+    for entry in os.scandir(EXPORT_DIR):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            pass  # 可能被其他 process 刪除或仍在使用中
+    return removed
+
+def make_export_path(prefix, suffix):
+    """在 EXPORT_DIR 建立暫存檔，回傳 (fd, path)；process 啟動後第一次使用及之後每 10 分鐘順便清除過舊的檔案。"""
+    global _last_cleanup
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    if time.time() - _last_cleanup > _CLEANUP_INTERVAL_S:
+        _last_cleanup = time.time()
+        cleanup_export_dir()
+    return tempfile.mkstemp(prefix=prefix, suffix=suffix, dir=EXPORT_DIR)
+
+def export_file(rows, columns, fmt, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    串流寫入磁碟上的暫存檔，回傳開啟的 DownloadFile，供 st.download_button(data=callable) 在點擊時產生。
+    寫檔過程記憶體只保留一個 chunk，檔案不會先整份讀回；
+    注意 Streamlit 提供下載時仍會把檔案內容放進它的 media 儲存區，因此整份檔案會在記憶體中存在一次。
+    """
+    fd, path = make_export_path("bp_export_", f".{EXPORT_FORMATS[fmt]['ext']}")
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            write_rows(rows, columns, fmt, fh, chunk_size=chunk_size)
+    except Exception:
+        os.remove(path)
+        raise
+    return DownloadFile(path, delete=True)
@@ -0,0 +1,239 @@
+import json
+import hashlib
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from bp_data import clean_title, LAYOUT_COMPONENT_NAMES
+
+# ==========================================
+#  Blueprint Lint (單次走訪 + 可插拔規則)
+# ==========================================
+# 節點規則以 @lint_rule 註冊，走訪時每個節點依序套用所有規則，整份藍圖只走一次。
+# 需要跨節點資訊的檢查 (重複 uuid、指定類型組件漏埋點) 在走訪時收集，最後彙整。
+
+NODE_RULES = []
+
+def lint_rule(rule_id, level, desc, skip_root=False):
+    """
+    註冊節點規則。check(node, path) 回傳訊息字串 (有問題) 或 None。
+    skip_root=True 時不檢查檔案最外層的文件物件 (它不是組件，例如通常沒有 uuid)。
+    """
+    def decorator(check):
+        NODE_RULES.append({"id": rule_id, "level": level, "desc": desc, "check": check, "skip_root": skip_root})
+        return check
+    return decorator
+
+GLOBAL_RULES = {
+    "duplicate-uuid": {"level": "error", "desc": "多個組件使用相同 uuid", "default": True},
+    # 需指定 tracked_types (需要埋點的組件類型) 才會生效，預設不啟用
+    "missing-event-id": {"level": "warning", "desc": "指定需埋點的組件類型缺少 eventId", "default": False},
+}
+
+def _children(node):
+    return [c for c in (node.get('subComponents') or []) + (node.get('pages') or []) if isinstance(c, dict)]
+
+def _label(node):
+    raw_title = (node.get('parameters') or {}).get('title') or node.get('title')
+    return clean_title(raw_title) or node.get('name', 'Unknown')
+
+def _tab_list(node):
+    """
+    分頁實際所在的清單，回傳 (key, list)；statePageIndex 容器或沒有 subComponents 時分頁在 pages。
+    兩個清單都沒有時回傳 (None, None)。
+    """
+    params = node.get('parameters') or {}
+    if 'pages' in node and ('statePageIndex' in params or not node.get('subComponents')): return 'pages', node.get('pages') or []
+    if 'subComponents' in node: return 'subComponents', node.get('subComponents') or []
+    return None, None
+
+# --- 內建節點規則 ---
+@lint_rule("missing-uuid", "warning", "組件沒有 uuid，無法被 Deep Link 或埋點對應", skip_root=True)
+def _check_missing_uuid(node, path):
+    if not node.get('uuid'): return "缺少 uuid"
+
+@lint_rule("titles-mismatch", "error", "titles 數量與分頁數量不一致")
+def _check_titles_mismatch(node, path):
+    titles = (node.get('parameters') or {}).get('titles')
+    if not isinstance(titles, list): return None
+    key, tabs = _tab_list(node)
+    if key and len(titles) != len(tabs):
+        return f"titles 有 {len(titles)} 個，分頁 ({key}) 有 {len(tabs)} 個"
+
+# ==========================================
+#  走訪 (單一子樹)
+# ==========================================
+def _lint_subtree(node, path_prefix, rule_ids, descend=True):
+    """
+    走訪一個子樹並套用所有節點規則，回傳可合併的部分結果。
+    descend=False 時只檢查 node 本身 (子節點由其他工作單位負責)。
+    可在 worker process 中執行，因此只回傳可 pickle 的基本型別。
+    """
+    rules = [r for r in NODE_RULES if r['id'] in rule_ids]
+    issues = []
+    uuid_paths = defaultdict(list)
+    untracked = defaultdict(list)  # name -> [(path, uuid)]，沒有 eventId 的組件
+    count = 0
+
+    stack = [(node, path_prefix)]
+    while stack:
+        comp, path = stack.pop()
+        count += 1
+        label = _label(comp)
+        current_path = f"{path} > {label}" if path else label
+        uuid = comp.get('uuid')
+        name = comp.get('name', 'Unknown')
+
+        is_root = not path  # 只有檔案最外層的文件物件沒有上層路徑
+        for rule in rules:
+            if is_root and rule['skip_root']: continue
+            message = rule['check'](comp, current_path)
+            if message:
+                issues.append({"Rule": rule['id'], "Level": rule['level'], "Path": current_path, "UUID": uuid or "", "Message": message})
+
+        if uuid: uuid_paths[uuid].append(current_path)
+        if name not in LAYOUT_COMPONENT_NAMES and not comp.get('eventId'):
+            untracked[name].append((current_path, uuid or ""))
+
+        if not descend: continue
+        for child in reversed(_children(comp)):
+            stack.append((child, current_path))
+
+    return {
+        "count": count,
+        "issues": issues,
+        "uuid_paths": dict(uuid_paths),
+        "untracked": dict(untracked),
+    }
+
+def _lint_subtree_task(args):
+    return _lint_subtree(*args)
+
+# ==========================================
+#  子樹快取 (以內容 hash 為 key，新版本只重新檢查有變動的子樹)
+# ==========================================
+def split_units(data, split_depth=2):
+    """
+    將藍圖切成工作單位，回傳 (shallow, units)，元素皆為 (node, path_prefix)。
+    - shallow：深度 < split_depth 的節點，只檢查自己
+    - units：深度 = split_depth 的子樹 (通常是各分頁 / Tab 底下的區塊)，各自 hash 與快取
+    只有一個子節點的包裝容器不算一層，避免整份藍圖落在同一個單位。
+    """
+    shallow, units = [], []
+    stack = [(data, "", 0)]
+    while stack:
+        node, path, depth = stack.pop()
+        if depth >= split_depth:
+            units.append((node, path))
+            continue
+        shallow.append((node, path))
+        label = _label(node)
+        current_path = f"{path} > {label}" if path else label
+        children = _children(node)
+        next_depth = depth if len(children) == 1 else depth + 1
+        for child in reversed(children):
+            stack.append((child, current_path, next_depth))
+    return shallow, units
+
+_CACHE_MAX_ENTRIES = 2048
+_subtree_cache = OrderedDict()
+
+def subtree_hash(node):
+    """回傳 (sha1, 序列化大小)，大小用來判斷是否值得平行處理。"""
+    raw = json.dumps(node, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha1(raw).hexdigest(), len(raw)
+
+def _cache_get(key):
+    if key in _subtree_cache:
+        _subtree_cache.move_to_end(key)
+        return _subtree_cache[key]
+    return None
+
+def _cache_put(key, value):
+    _subtree_cache[key] = value
+    _subtree_cache.move_to_end(key)
+    while len(_subtree_cache) > _CACHE_MAX_ENTRIES:
+        _subtree_cache.popitem(last=False)
+
+def clear_lint_cache():
+    _subtree_cache.clear()
+
+# ==========================================
+#  主流程
+# ==========================================
+def default_rule_ids():
+    return [r['id'] for r in NODE_RULES] + [k for k, v in GLOBAL_RULES.items() if v['default']]
+
+def lint_blueprint(data, rule_ids=None, tracked_types=None, workers=1, split_depth=2, parallel_threshold=2 * 1024 * 1024):
+    """
+    檢查整份藍圖，回傳 (issues, stats)。
+    - rule_ids: 要啟用的規則 (預設為 default_rule_ids())
+    - tracked_types: missing-event-id 規則檢查的組件類型 (name)，未指定時該規則不會產生結果
+    - 藍圖依 split_depth 切成多個子樹單位，各單位結果以內容 hash 快取，新版本只重新檢查有變動的單位
+    - workers > 1 且待檢查的單位總大小超過 parallel_threshold (bytes) 時，分散到多個 process 檢查
+    """
+    if not data: return [], {}
+    rule_ids = tuple(sorted(rule_ids if rule_ids is not None else default_rule_ids()))
+    node_rule_ids = tuple(r for r in rule_ids if r not in GLOBAL_RULES)
+
+    shallow, units = split_units(data, split_depth)
+    # 淺層節點數量少，直接在主程序檢查 (規則套用在真正的節點上，只是不往下走)
+    shallow_results = [_lint_subtree(node, path, node_rule_ids, descend=False) for node, path in shallow]
+
+    results = [None] * len(units)
+    pending = []
+    cache_hits, pending_size = 0, 0
+    for i, (node, path) in enumerate(units):
+        digest, size = subtree_hash(node)
+        key = (digest, path, node_rule_ids)
+        cached = _cache_get(key)
+        if cached is not None:
+            results[i] = cached
+            cache_hits += 1
+        else:
+            pending.append((i, key, node, path))
+            pending_size += size
+
+    if pending:
+        tasks = [(node, path, node_rule_ids) for _, _, node, path in pending]
+        if workers > 1 and len(pending) > 1 and pending_size > parallel_threshold:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                outputs = list(pool.map(_lint_subtree_task, tasks))
+        else:
+            outputs = [_lint_subtree_task(t) for t in tasks]
+        for (i, key, _, _), output in zip(pending, outputs):
+            results[i] = output
+            _cache_put(key, output)
+
+    issues, stats = _merge_results(shallow_results + results, rule_ids, tracked_types)
+    stats.update({"subtrees": len(units), "cache_hits": cache_hits, "relinted": len(pending)})
+    return issues, stats
+
+def _merge_results(partials, rule_ids, tracked_types=None):
+    issues = []
+    uuid_paths = defaultdict(list)
+    untracked = defaultdict(list)
+    for part in partials:
+        issues.extend(part['issues'])
+        for uuid, paths in part['uuid_paths'].items(): uuid_paths[uuid].extend(paths)
+        for name, nodes in part['untracked'].items(): untracked[name].extend(nodes)
+
+    if "duplicate-uuid" in rule_ids:
+        for uuid, paths in uuid_paths.items():
+            if len(paths) < 2: continue
+            for path in paths:
+                issues.append({"Rule": "duplicate-uuid", "Level": GLOBAL_RULES["duplicate-uuid"]["level"], "Path": path, "UUID": uuid,
+                               "Message": f"uuid 重複 {len(paths)} 次"})
+
+    if "missing-event-id" in rule_ids and tracked_types:
+        for name in tracked_types:
+            for path, uuid in untracked.get(name, []):
+                issues.append({"Rule": "missing-event-id", "Level": GLOBAL_RULES["missing-event-id"]["level"], "Path": path, "UUID": uuid,
+                               "Message": f"「{name}」需要埋點，此處缺少 eventId"})
+
+    stats = {"components": sum(p['count'] for p in partials), "issues": len(issues)}
+    return issues, stats
+
+def list_rules():
+    rules = [{"id": r['id'], "level": r['level'], "desc": r['desc'], "default": True} for r in NODE_RULES]
+    rules += [{"id": k, "level": v['level'], "desc": v['desc'], "default": v['default']} for k, v in GLOBAL_RULES.items()]
+    return rules
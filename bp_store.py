@@ -0,0 +1,247 @@
+import os
+import json
+import zlib
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from bp_data import clean_title
+
+# ==========================================
+#  Blueprint 歷史版本庫 (SQLite)
+# ==========================================
+# 每次上傳的藍圖存成一個 version，組件 / 埋點 / 參數拆成正規化的表並建立索引，
+# 跨版本查詢 (例如某個 eventId 出現在哪些版本) 不需要再重新上傳舊 zip。
+
+DEFAULT_DB_PATH = os.environ.get(
+    "BP_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "bp_history.db")
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    sha1 TEXT NOT NULL UNIQUE,
+    created_at TEXT NOT NULL,
+    component_count INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS components (
+    version_id INTEGER NOT NULL REFERENCES versions(id) ON DELETE CASCADE,
+    uuid TEXT,
+    parent_uuid TEXT,
+    name TEXT,
+    title TEXT,
+    depth INTEGER NOT NULL,
+    child_index INTEGER NOT NULL,
+    list_type TEXT,
+    path TEXT
+);
+CREATE TABLE IF NOT EXISTS events (
+    version_id INTEGER NOT NULL REFERENCES versions(id) ON DELETE CASCADE,
+    event_id TEXT NOT NULL,
+    uuid TEXT
+);
+CREATE TABLE IF NOT EXISTS params (
+    version_id INTEGER NOT NULL REFERENCES versions(id) ON DELETE CASCADE,
+    uuid TEXT,
+    key TEXT NOT NULL,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_components_uuid ON components(uuid, version_id);
+CREATE INDEX IF NOT EXISTS idx_components_parent ON components(parent_uuid, version_id);
+CREATE INDEX IF NOT EXISTS idx_components_version ON components(version_id);
+CREATE INDEX IF NOT EXISTS idx_events_event ON events(event_id, version_id);
+CREATE INDEX IF NOT EXISTS idx_events_version ON events(version_id);
+CREATE INDEX IF NOT EXISTS idx_params_key ON params(key, version_id);
+CREATE INDEX IF NOT EXISTS idx_params_version ON params(version_id);
+"""
+
+def connect(db_path=None, check_same_thread=True):
+    conn = sqlite3.connect(db_path or DEFAULT_DB_PATH, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+    _migrate(conn)
+    return conn
+
+# 每個 process 每個 DB 只開一條連線 (schema / migration 只在第一次執行)，
+# Streamlit 的各個 session 與背景寫入 thread 共用，以鎖序列化存取。
+_connections = {}
+_connections_lock = threading.RLock()
+
+@contextmanager
+def _connection(db_path=None):
+    path = db_path or DEFAULT_DB_PATH
+    with _connections_lock:
+        conn = _connections.get(path)
+        if conn is None:
+            conn = _connections[path] = connect(path, check_same_thread=False)
+        yield conn
+
+def _migrate(conn):
+    """舊版 DB 沒有 components.list_type：補上欄位並由保存的藍圖重新展開 components。"""
+    columns = [r[1] for r in conn.execute("PRAGMA table_info(components)")]
+    if 'list_type' in columns: return
+    with conn:
+        conn.execute("ALTER TABLE components ADD COLUMN list_type TEXT")
+        for version_id, blob in conn.execute("SELECT id, data FROM versions").fetchall():
+            components, _, _ = _flatten(json.loads(zlib.decompress(blob)))
+            conn.execute("DELETE FROM components WHERE version_id = ?", (version_id,))
+            _insert_components(conn, version_id, components)
+
+def _insert_components(conn, version_id, components):
+    conn.executemany(
+        "INSERT INTO components (version_id, uuid, parent_uuid, name, title, depth, child_index, list_type, path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        ((version_id,) + r for r in components)
+    )
+
+def _flatten(data):
+    """
+    非遞迴走訪藍圖，產生 components / events / params 三張表的 rows。
+    child_index 是節點在父節點 subComponents 或 pages 清單中的位置，list_type 記錄是哪一個清單。
+    """
+    components, events, params = [], [], []
+    stack = [(data, None, 0, 0, None, "")]
+    while stack:
+        node, parent_uuid, depth, child_index, list_type, path = stack.pop()
+        if not isinstance(node, dict): continue
+        uuid = node.get('uuid')
+        name = node.get('name', 'Unknown')
+        node_params = node.get('parameters') or {}
+        title = clean_title(node_params.get('title') or node.get('title'))
+        label = title if title else name
+        current_path = f"{path} > {label}" if path else label
+
+        components.append((uuid, parent_uuid, name, title, depth, child_index, list_type, current_path))
+        if node.get('eventId'):
+            events.append((node['eventId'], uuid))
+        for key, value in node_params.items():
+            if not isinstance(value, str):
+                value = json.dumps(value, ensure_ascii=False)
+            params.append((uuid, key, value))
+
+        children = []
+        for key in ('subComponents', 'pages'):
+            for i, child in enumerate(node.get(key) or []): children.append((child, i, key))
+        for child, i, key in reversed(children):
+            stack.append((child, uuid, depth + 1, i, key, current_path))
+    return components, events, params
+
+def ingest_blueprint(data, name, db_path=None):
+    """
+    將藍圖存成新版本，回傳 version_id。
+    內容相同 (sha1 相同) 的藍圖不會重複寫入，直接回傳既有版本。
+    """
+    raw = json.dumps(data, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    sha1 = hashlib.sha1(raw).hexdigest()
+    with _connection(db_path) as conn:
+        row = conn.execute("SELECT id FROM versions WHERE sha1 = ?", (sha1,)).fetchone()
+    if row: return row[0]
+
+    # 序列化 / 展開在鎖外進行，只有寫入時才佔用連線
+    components, events, params = _flatten(data)
+    blob = zlib.compress(raw)
+    with _connection(db_path) as conn:
+        row = conn.execute("SELECT id FROM versions WHERE sha1 = ?", (sha1,)).fetchone()
+        if row: return row[0]
+        try:
+            with conn:  # 單一 transaction 批次寫入
+                cur = conn.execute(
+                    "INSERT INTO versions (name, sha1, created_at, component_count, data) VALUES (?, ?, ?, ?, ?)",
+                    (name, sha1, datetime.now().isoformat(timespec='seconds'), len(components), blob)
+                )
+                version_id = cur.lastrowid
+                _insert_components(conn, version_id, components)
+                conn.executemany("INSERT INTO events (version_id, event_id, uuid) VALUES (?, ?, ?)", ((version_id,) + r for r in events))
+                conn.executemany("INSERT INTO params (version_id, uuid, key, value) VALUES (?, ?, ?, ?)", ((version_id,) + r for r in params))
+        except sqlite3.IntegrityError:
+            # 另一個 process 剛好寫入同一份藍圖
+            row = conn.execute("SELECT id FROM versions WHERE sha1 = ?", (sha1,)).fetchone()
+            if row: return row[0]
+            raise
+        return version_id
+
+def list_versions(limit=None, db_path=None):
+    """由新到舊列出版本；limit 為 None 時列出全部。"""
+    sql = "SELECT id, name, created_at, component_count FROM versions ORDER BY id DESC"
+    with _connection(db_path) as conn:
+        rows = conn.execute(sql + " LIMIT ?", (limit,)).fetchall() if limit else conn.execute(sql).fetchall()
+    return [{"id": r[0], "name": r[1], "created_at": r[2], "component_count": r[3]} for r in rows]
+
+def load_version(version_id, db_path=None):
+    with _connection(db_path) as conn:
+        row = conn.execute("SELECT data FROM versions WHERE id = ?", (version_id,)).fetchone()
+    if not row: return None
+    return json.loads(zlib.decompress(row[0]))
+
+def delete_version(version_id, db_path=None):
+    with _connection(db_path) as conn:
+        with conn:
+            conn.execute("DELETE FROM versions WHERE id = ?", (version_id,))
+
+# ==========================================
+#  跨版本查詢
+# ==========================================
+def versions_with_event(event_id, db_path=None):
+    """某個 eventId 出現在哪些版本 (以及掛在哪個組件上)。"""
+    sql = """
+        SELECT v.id, v.name, v.created_at, e.uuid, c.path
+        FROM events e
+        JOIN versions v ON v.id = e.version_id
+        LEFT JOIN components c ON c.version_id = e.version_id AND c.uuid = e.uuid
+        WHERE e.event_id = ?
+        ORDER BY v.id
+    """
+    with _connection(db_path) as conn:
+        rows = conn.execute(sql, (event_id,)).fetchall()
+    return [{"Version ID": r[0], "Version": r[1], "Created": r[2], "UUID": r[3], "Path": r[4]} for r in rows]
+
+def versions_with_uuid(uuid, db_path=None):
+    """某個組件 UUID 在各版本中的位置與標題。"""
+    sql = """
+        SELECT v.id, v.name, v.created_at, c.name, c.title, c.parent_uuid, c.list_type, c.child_index, c.path
+        FROM components c
+        JOIN versions v ON v.id = c.version_id
+        WHERE c.uuid = ?
+        ORDER BY v.id
+    """
+    with _connection(db_path) as conn:
+        rows = conn.execute(sql, (uuid,)).fetchall()
+    return [{"Version ID": r[0], "Version": r[1], "Created": r[2], "Component": r[3], "Title": r[4],
+             "Parent UUID": r[5], "List": r[6], "Index": r[7], "Path": r[8]} for r in rows]
+
+def tab_index_history(keyword, parent_uuid="20000001", db_path=None):
+    """
+    指定父節點底下、名稱或標題包含 keyword 的分頁，在各版本中的 Tab Index。
+    Index 的算法與 find_tab_index_by_name 相同 (subComponents 中的位置)，pages 底下的節點不列入。
+    """
+    sql = """
+        SELECT v.id, v.name, v.created_at, c.child_index, c.title, c.name, c.uuid
+        FROM components c
+        JOIN versions v ON v.id = c.version_id
+        WHERE c.parent_uuid = ? AND c.list_type = 'subComponents' AND (c.title LIKE ? OR c.name LIKE ?)
+        ORDER BY v.id, c.child_index
+    """
+    pattern = f"%{keyword}%"
+    with _connection(db_path) as conn:
+        rows = conn.execute(sql, (parent_uuid, pattern, pattern)).fetchall()
+    return [{"Version ID": r[0], "Version": r[1], "Created": r[2], "Index": r[3], "Title": r[4],
+             "Component": r[5], "UUID": r[6]} for r in rows]
+
+def param_history(key, db_path=None):
+    """某個 parameter key (例如 stateTabIndex) 在各版本中的值。"""
+    sql = """
+        SELECT v.id, v.name, p.uuid, p.value
+        FROM params p
+        JOIN versions v ON v.id = p.version_id
+        WHERE p.key = ?
+        ORDER BY v.id
+    """
+    with _connection(db_path) as conn:
+        rows = conn.execute(sql, (key,)).fetchall()
+    return [{"Version ID": r[0], "Version": r[1], "UUID": r[2], "Value": r[3]} for r in rows]
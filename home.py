@@ -84,6 +84,20 @@ tools = [
         "desc": "視覺化呈現 App 的 IA 架構與導航層級，支援圖片下載。",
         "page": "pages/app_structure.py",
         "btn_label": "查看架構"
+    },
+    {
+        "title": "藍圖版本歷史",
+        "icon": "🗄️",
+        "desc": "自動保存每次上傳的藍圖，跨版本查詢 Event ID、UUID 與 Tab Index 的變化。",
+        "page": "pages/bp_history.py",
+        "btn_label": "查詢歷史"
+    },
+    {
+        "title": "藍圖檢查 (Lint)",
+        "icon": "🧹",
+        "desc": "檢查重複 UUID、漏埋點、titles 與分頁數量不符等常見問題。",
+        "page": "pages/blueprint_lint.py",
+        "btn_label": "開始檢查"
     }
 ]
 
@@ -0,0 +1,259 @@
+"""
+多人同時使用的壓力測試 (Headless)。
+
+以 Streamlit 的 AppTest 模擬 N 個同時在線的 session，每個 session 依序：
+上傳藍圖 → 切換 Deep Link 情境 → 篩選埋點表 → 調整架構圖層級，
+統計每次 rerun 的 p50/p95 延遲、每個 session 增加的 RSS 與整體吞吐量，
+超過預算時以 exit code 1 結束 (可直接放進 CI)。
+
+每個 session 跑在獨立的 process、各自持有 AppTest (AppTest 會改動 process 層級的全域狀態，
+無法在同一個 process 內平行執行)，所有 session 同時開始，延遲包含彼此搶 CPU / SQLite 的時間。
+藍圖透過側邊欄的 file_uploader 上傳，解析與寫入歷史版本庫都會計入。
+注意：這不是真正的 `streamlit run` server，websocket 與前端渲染的成本不在量測範圍內。
+
+用法：
+    python load_test.py --blueprint path/to/blueprint.zip --sessions 8
+    python load_test.py --blueprint bp.json --sessions 4 --p95-budget-ms 1500 --json
+"""
+import os
+import sys
+import gc
+import json
+import time
+import queue
+import argparse
+import shutil
+import tempfile
+import multiprocessing as mp
+from threading import BrokenBarrierError
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+# 歷史版本庫指到暫存檔，避免測試資料寫進正式 DB (子 process 會繼承此環境變數)；測試結束後刪除
+_OWN_STORE_DIR = None
+if "BP_STORE_PATH" not in os.environ:
+    _OWN_STORE_DIR = tempfile.mkdtemp(prefix="bp_load_")
+    os.environ["BP_STORE_PATH"] = os.path.join(_OWN_STORE_DIR, "bp_history.db")
+
+from streamlit.testing.v1 import AppTest
+
+PAGES = {
+    "deep_link": os.path.join(ROOT_DIR, "pages", "deep_link_tool.py"),
+    "data_mining": os.path.join(ROOT_DIR, "pages", "data_mining.py"),
+    "app_structure": os.path.join(ROOT_DIR, "pages", "app_structure.py"),
+}
+SCENARIOS = ["Club Board", "Content Article", "Stock", "Custom"]
+UPLOAD_MIME = {".json": "application/json", ".zip": "application/zip"}
+
+def get_rss_mb():
+    """目前 process 的 RSS (MB)；優先用 psutil，沒有就讀 /proc。"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def percentile(values, pct):
+    if not values: return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+class SessionRunner:
+    """模擬單一使用者 session，記錄每一步 rerun 的延遲。"""
+
+    def __init__(self, session_id, blueprint_path, timeout):
+        self.session_id = session_id
+        self.timeout = timeout
+        with open(blueprint_path, 'rb') as f:
+            name = os.path.basename(blueprint_path)
+            self.upload = (name, f.read(), UPLOAD_MIME.get(os.path.splitext(name)[1].lower(), "application/octet-stream"))
+        self.samples = []   # (step, ms)
+        self.errors = []
+
+    def _timed(self, step, fn):
+        start = time.perf_counter()
+        try:
+            at = fn()
+        except Exception as e:
+            # AppTest 本身操作元件失敗 (非頁面例外) 也記為錯誤
+            self.errors.append(f"[{step}] {type(e).__name__}: {e}")
+            return None
+        self.samples.append((step, (time.perf_counter() - start) * 1000))
+        if at is not None and len(at.exception):
+            self.errors.append(f"[{step}] {at.exception[0].message}")
+        return at
+
+    # 每次 rerun 後元件樹會重建，因此每一步都重新取得元件；
+    # 找不到元件代表頁面沒有正常渲染，記為錯誤，不可默默略過 (否則樣本數變少仍顯示通過)
+    def _find(self, step, widgets, key=None, label=None):
+        widget = next((w for w in widgets if (key is None or w.key == key) and (label is None or w.label == label)), None)
+        if widget is None: self.errors.append(f"[{step}] 找不到元件 (key={key}, label={label})")
+        return widget
+
+    def _open_page(self, page):
+        """開新 session 進入頁面，並從側邊欄上傳藍圖 (解析 + 寫入歷史版本庫)。"""
+        at = AppTest.from_file(PAGES[page], default_timeout=self.timeout)
+        self._timed(f"{page}:load", at.run)
+        uploader = self._find(f"{page}:upload", at.sidebar.file_uploader, key="global_uploader")
+        if uploader: self._timed(f"{page}:upload", lambda: uploader.upload(*self.upload).run())
+        return at
+
+    def run(self):
+        # 1. Deep Link：切換情境
+        at = self._open_page("deep_link")
+        for scenario in SCENARIOS:
+            step = f"deep_link:{scenario}"
+            radio = self._find(step, at.radio, key="dl_scenario")
+            if radio: self._timed(step, lambda: radio.set_value(scenario).run())
+
+        # 2. 埋點管理：篩選類型與狀態
+        at = self._open_page("data_mining")
+        multiselect = self._find("data_mining:filter_type", at.multiselect, label="篩選類型")
+        if multiselect: self._timed("data_mining:filter_type", lambda: multiselect.set_value(multiselect.options[:2]).run())
+        for value in ["有埋點", "無埋點", "全部"]:
+            step = f"data_mining:{value}"
+            radio = self._find(step, at.radio, label="篩選狀態")
+            if radio: self._timed(step, lambda: radio.set_value(value).run())
+
+        # 3. 架構圖：切換為手動層級並調整深度
+        at = self._open_page("app_structure")
+        toggle = self._find("app_structure:manual", at.toggle)
+        if toggle: self._timed("app_structure:manual", lambda: toggle.set_value(False).run())
+        for depth in [3, 1, 2]:
+            step = f"app_structure:depth{depth}"
+            slider = self._find(step, at.slider)
+            if slider: self._timed(step, lambda: slider.set_value(depth).run())
+        return self
+
+def _session_process(session_id, blueprint_path, timeout, barrier, results):
+    """子 process：暖機後取 RSS 基準，等所有 session 就緒後同時開始。"""
+    report = {"session_id": session_id, "samples": [], "errors": []}
+    try:
+        # 暖機 (載入 streamlit、pandas、頁面模組等一次性成本)，避免算進這個 session 增加的記憶體
+        warmup = SessionRunner("warmup", blueprint_path, timeout).run()
+        report['errors'] += [f"[warmup] {e}" for e in warmup.errors]
+        del warmup
+        gc.collect()
+        report['rss_start_mb'] = get_rss_mb()
+        runner = SessionRunner(session_id, blueprint_path, timeout)
+        barrier.wait(timeout=timeout * 10)
+        report['started_at'] = time.time()
+        runner.run()
+        report['finished_at'] = time.time()
+        report['samples'] = runner.samples
+        report['errors'] += runner.errors
+    except BrokenBarrierError:
+        report['errors'].append("[session] 等待其他 session 就緒逾時")
+    except Exception as e:
+        report['errors'].append(f"[session] {type(e).__name__}: {e}")
+    report['rss_end_mb'] = get_rss_mb()
+    results.put(report)
+
+def run_load_test(blueprint_path, sessions, timeout=60):
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(sessions)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_session_process, args=(i, blueprint_path, timeout, barrier, results)) for i in range(sessions)]
+    for p in procs: p.start()
+
+    reports = []
+    while len(reports) < sessions:
+        try:
+            reports.append(results.get(timeout=1))
+        except queue.Empty:
+            if not any(p.is_alive() for p in procs): break
+    for p in procs: p.join()
+
+    errors = [f"[session {r['session_id']}] {e}" for r in reports for e in r['errors']]
+    if len(reports) < sessions: errors.append(f"{sessions - len(reports)} 個 session process 異常結束，沒有回報結果")
+
+    latencies = [ms for r in reports for step, ms in r['samples']]
+    per_step = {}
+    for r in reports:
+        for step, ms in r['samples']:
+            per_step.setdefault(step.split(":")[0], []).append(ms)
+    started = [r['started_at'] for r in reports if 'started_at' in r]
+    finished = [r['finished_at'] for r in reports if 'finished_at' in r]
+    wall = max(finished) - min(started) if started and finished else 0.0
+    measured = [r for r in reports if 'rss_start_mb' in r]
+    rss_before = sum(r['rss_start_mb'] for r in measured)
+    rss_after = sum(r['rss_end_mb'] for r in measured)
+
+    return {
+        "sessions": sessions,
+        "reruns": len(latencies),
+        "wall_s": wall,
+        "throughput_rps": len(latencies) / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "per_page": {k: {"p50_ms": percentile(v, 50), "p95_ms": percentile(v, 95), "count": len(v)} for k, v in per_step.items()},
+        "rss_before_mb": rss_before,
+        "rss_after_mb": rss_after,
+        "rss_per_session_mb": (rss_after - rss_before) / len(measured) if measured else 0.0,
+        "errors": errors,
+    }
+
+def check_budgets(report, p50_budget=None, p95_budget=None, rss_budget=None):
+    failures = []
+    if p50_budget is not None and report['p50_ms'] > p50_budget:
+        failures.append(f"p50 {report['p50_ms']:.0f} ms > {p50_budget:.0f} ms")
+    if p95_budget is not None and report['p95_ms'] > p95_budget:
+        failures.append(f"p95 {report['p95_ms']:.0f} ms > {p95_budget:.0f} ms")
+    if rss_budget is not None and report['rss_per_session_mb'] > rss_budget:
+        failures.append(f"RSS/session {report['rss_per_session_mb']:.1f} MB > {rss_budget:.1f} MB")
+    if report['errors']:
+        failures.append(f"{len(report['errors'])} 個頁面例外")
+    return failures
+
+def print_report(report):
+    print(f"Sessions: {report['sessions']}  Reruns: {report['reruns']}  Wall: {report['wall_s']:.1f}s  "
+          f"Throughput: {report['throughput_rps']:.2f} reruns/s")
+    print(f"Latency p50: {report['p50_ms']:.0f} ms  p95: {report['p95_ms']:.0f} ms")
+    for page, s in report['per_page'].items():
+        print(f"  - {page:<14} p50 {s['p50_ms']:>7.0f} ms  p95 {s['p95_ms']:>7.0f} ms  ({s['count']} runs)")
+    print(f"RSS (所有 session process 合計): {report['rss_before_mb']:.0f} MB -> {report['rss_after_mb']:.0f} MB "
+          f"(+{report['rss_per_session_mb']:.1f} MB / session)")
+    for err in report['errors'][:10]:
+        print(f"  ! {err}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streamlit 頁面多人壓力測試")
+    parser.add_argument("--blueprint", required=True, help="blueprint.json 或 zip")
+    parser.add_argument("--sessions", type=int, default=4, help="同時在線的 session 數")
+    parser.add_argument("--timeout", type=float, default=60, help="單次 rerun 逾時秒數")
+    parser.add_argument("--p50-budget-ms", type=float, default=None)
+    parser.add_argument("--p95-budget-ms", type=float, default=None)
+    parser.add_argument("--rss-budget-mb", type=float, default=None, help="每個 session 允許增加的 RSS")
+    parser.add_argument("--json", action="store_true", help="以 JSON 輸出報表")
+    args = parser.parse_args(argv)
+
+    try:
+        report = run_load_test(args.blueprint, args.sessions, timeout=args.timeout)
+    finally:
+        if _OWN_STORE_DIR: shutil.rmtree(_OWN_STORE_DIR, ignore_errors=True)
+    failures = check_budgets(report, args.p50_budget_ms, args.p95_budget_ms, args.rss_budget_mb)
+    report['failures'] = failures
+
+    if args.json: print(json.dumps(report, ensure_ascii=False, indent=2))
+    else: print_report(report)
+
+    if failures:
+        print("❌ 超出預算: " + "; ".join(failures), file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,7 +4,7 @@ import os
 
 # 嘗試匯入 ECharts
 try:
-    from streamlit_echarts import st_echarts
+    from streamlit_echarts import st_echarts, JsCode
     HAS_ECHARTS = True
 except ImportError:
     HAS_ECHARTS = False
@@ -17,7 +17,7 @@ try:
 except:
     pass
 
-from bp_data import render_global_sidebar, get_blueprint_data, get_echarts_tree_data
+from bp_data import render_global_sidebar, get_blueprint_data, get_derived, get_echarts_tree_data, compute_subtree_stats, pick_depth_for_budget
 
 st.set_page_config(page_title="App 架構導覽", layout="wide")
 render_global_sidebar()
@@ -35,19 +35,41 @@ if not blueprint_data:
     st.warning("⚠️ 請先在左側上傳 Blueprint。")
     st.stop()
 
+# --- 子樹統計 (換檔後才重算) ---
+subtree_stats = get_derived('sitemap_stats', compute_subtree_stats)
+if not subtree_stats:
+    st.error("無法解析架構資料。")
+    st.stop()
+depth_hist = subtree_stats["depth_hist"]
+
 # --- 控制項 ---
 with st.container(border=True):
-    c1, c2 = st.columns([1, 3])
+    c1, c2, c3 = st.columns([1, 1, 2])
     with c1:
-        initial_depth = st.slider("初始展開層級", 1, 5, 2, help="重新整理後預設展開的深度")
+        auto_depth = st.toggle("依節點數自動決定層級", value=True)
+        if auto_depth:
+            node_budget = st.number_input("畫面節點上限", min_value=10, max_value=5000, value=150, step=10)
+            initial_depth = pick_depth_for_budget(depth_hist, node_budget)
+            st.caption(f"自動展開至第 {initial_depth} 層")
+        else:
+            initial_depth = st.slider("初始展開層級", 1, max(5, len(depth_hist) - 1), 2, help="重新整理後預設展開的深度")
     with c2:
-        st.info("💡 提示：此圖表支援點擊展開/收合，且**不會**刷新頁面。滑鼠懸停可查看 Event ID。")
+        render_budget = st.number_input("載入節點上限", min_value=100, max_value=100000, value=5000, step=500,
+                                        help="超過此數量的深層子樹不會載入圖表，節點以虛線框與 (+N) 標示")
+        max_depth = pick_depth_for_budget(depth_hist, render_budget, min_depth=initial_depth)
+        if max_depth >= len(depth_hist) - 1: max_depth = None
+    with c3:
+        st.info("💡 提示：此圖表支援點擊展開/收合，且**不會**刷新頁面。滑鼠懸停可查看 Event ID 與子節點數。")
+        st.caption(f"共 {subtree_stats['total']} 個節點、{len(depth_hist)} 層，最大分支數 {subtree_stats['max_fanout']}")
+        st.bar_chart({"節點數": depth_hist}, height=120)
 
 # --- 資料轉換 ---
 tree_data = get_echarts_tree_data(
     blueprint_data, 
     root_uuid="20000001", 
-    initial_depth=initial_depth
+    initial_depth=initial_depth,
+    max_depth=max_depth,
+    subtree_stats=subtree_stats
 )
 
 if not tree_data:
@@ -59,8 +81,11 @@ option = {
     "tooltip": {
         "trigger": "item",
         "triggerOn": "mousemove",
-        # Hover 顯示內容：{b}為名稱, {c}為 value (Event ID)
-        "formatter": "<strong>{b}</strong><br/>Event ID: {c}"
+        # Hover 顯示內容：名稱、Event ID 與可見子孫數
+        "formatter": JsCode(
+            "function (p) { return '<strong>' + p.name + '</strong><br/>Event ID: ' + p.value"
+            " + '<br/>子節點: ' + (p.data.descendants || 0); }"
+        ).js_code
     },
     "series": [
         {
@@ -0,0 +1,75 @@
+import streamlit as st
+import sys
+import os
+import time
+import pandas as pd
+
+try:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    root_dir = os.path.dirname(current_dir)
+    if root_dir not in sys.path:
+        sys.path.insert(0, root_dir)
+except:
+    pass
+
+from bp_data import render_global_sidebar, get_blueprint_data, get_derived, iter_node_records
+from bp_lint import lint_blueprint, list_rules
+
+st.set_page_config(page_title="藍圖檢查", page_icon="🧹", layout="wide")
+render_global_sidebar()
+
+st.title("🧹 Blueprint Lint")
+st.caption("一次走訪檢查重複 uuid、缺少 uuid、漏埋點與 titles 數量不符等問題。")
+
+blueprint_data = get_blueprint_data()
+if not blueprint_data:
+    st.warning("⚠️ 請先在左側上傳 Blueprint。")
+    st.stop()
+
+rules = list_rules()
+rule_labels = {r['id']: f"{r['id']} — {r['desc']}" for r in rules}
+
+# --- 控制項 ---
+with st.container(border=True):
+    c1, c2 = st.columns([3, 1])
+    with c1:
+        selected_rules = st.multiselect("啟用規則", options=list(rule_labels.keys()), default=[r['id'] for r in rules if r['default']], format_func=lambda x: rule_labels[x])
+    with c2:
+        workers = st.number_input("平行 Process 數", min_value=1, max_value=os.cpu_count() or 1, value=1, help="大型藍圖的分頁子樹會分散到多個 process 檢查")
+
+    tracked_types = []
+    if "missing-event-id" in selected_rules:
+        # 與埋點管理頁共用同一份節點快取
+        all_nodes = get_derived('data_mining_nodes', lambda data: list(iter_node_records(data)))
+        tracked_types = st.multiselect("需要埋點的組件類型", options=sorted({r['Component'] for r in all_nodes}),
+                                       help="只檢查這些類型的組件是否缺少 eventId")
+
+# 同一版藍圖、同一組規則只檢查一次；調整下方篩選的 rerun 直接取用結果
+lint_results = get_derived('lint_results', lambda data: {})
+params = (tuple(sorted(selected_rules)), tuple(sorted(tracked_types)))
+if params not in lint_results:
+    start = time.perf_counter()
+    issues, stats = lint_blueprint(blueprint_data, rule_ids=selected_rules, tracked_types=tracked_types, workers=int(workers))
+    lint_results[params] = (issues, stats, (time.perf_counter() - start) * 1000)
+issues, stats, elapsed_ms = lint_results[params]
+
+c1, c2, c3, c4 = st.columns(4)
+c1.metric("組件數", stats.get('components', 0))
+c2.metric("問題數", len(issues))
+c3.metric("重新檢查子樹", f"{stats.get('relinted', 0)} / {stats.get('subtrees', 0)}", help="其餘子樹 (分頁 / Tab 底下的區塊) 內容未變動，直接使用快取結果")
+c4.metric("耗時", f"{elapsed_ms:.0f} ms")
+
+if not issues:
+    st.success("✅ 沒有發現問題")
+    st.stop()
+
+df = pd.DataFrame(issues)
+summary = df.groupby(['Rule', 'Level']).size().reset_index(name='Count')
+
+with st.container(border=True):
+    st.subheader("規則統計")
+    st.dataframe(summary, use_container_width=True, hide_index=True)
+
+filter_rule = st.multiselect("篩選規則", options=summary['Rule'].tolist())
+if filter_rule: df = df[df['Rule'].isin(filter_rule)]
+st.dataframe(df, use_container_width=True, hide_index=True, height=600)
@@ -14,6 +14,7 @@ except:
 
 # 匯入共用模組
 from bp_data import render_global_sidebar, get_blueprint_data, analyze_blueprint_content
+from bp_export import iter_source_rows, export_file, available_formats, EXPORT_FORMATS, SOURCE_COLUMNS
 
 # --- 頁面設定 ---
 st.set_page_config(page_title="資料源分析", layout="wide")
@@ -41,6 +42,20 @@ if blueprint_data:
         st.warning("分析完成，但在該 Blueprint 中未找到明確的資料來源定義。")
     else:
         st.success(f"掃描 {count} 個組件，提取 {len(results)} 個資料節點")
+
+        # 匯出報表 (點擊下載時才串流寫檔)
+        c1, c2 = st.columns([1, 3])
+        with c1:
+            fmt = st.selectbox("匯出格式", available_formats(), format_func=lambda x: EXPORT_FORMATS[x]['label'], key="ds_export_fmt")
+        with c2:
+            st.write("")
+            st.download_button(
+                f"⬇️ 下載 {EXPORT_FORMATS[fmt]['label']}",
+                data=lambda: export_file(iter_source_rows(blueprint_data), SOURCE_COLUMNS, fmt),
+                file_name=f"data_sources.{EXPORT_FORMATS[fmt]['ext']}",
+                mime=EXPORT_FORMATS[fmt]['mime'],
+                on_click="ignore"
+            )
         st.divider()
 
         # 分組處理
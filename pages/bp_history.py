@@ -0,0 +1,73 @@
+import streamlit as st
+import sys
+import os
+import time
+import pandas as pd
+
+try:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    root_dir = os.path.dirname(current_dir)
+    if root_dir not in sys.path:
+        sys.path.insert(0, root_dir)
+except:
+    pass
+
+from bp_data import render_global_sidebar
+from bp_store import list_versions, delete_version, versions_with_event, versions_with_uuid, tab_index_history, param_history
+
+st.set_page_config(page_title="藍圖版本歷史", page_icon="🗄️", layout="wide")
+render_global_sidebar()
+
+st.title("🗄️ Blueprint 版本歷史")
+st.caption("每次上傳的藍圖都會自動存入本機 SQLite，可直接跨版本查詢，不需重新上傳舊檔。")
+
+versions = list_versions()
+if not versions:
+    st.warning("⚠️ 目前沒有任何歷史版本，請先在左側上傳 Blueprint。")
+    st.stop()
+
+# --- 版本列表 ---
+with st.expander(f"📚 已儲存版本 ({len(versions)})", expanded=False):
+    st.dataframe(pd.DataFrame(versions), use_container_width=True, hide_index=True)
+    labels = {v['id']: f"#{v['id']} {v['name']}" for v in versions}
+    c1, c2 = st.columns([3, 1])
+    with c1:
+        to_delete = st.selectbox("刪除版本", list(labels.keys()), format_func=lambda x: labels[x])
+    with c2:
+        st.write("")
+        if st.button("🗑️ 刪除", use_container_width=True):
+            delete_version(to_delete)
+            st.rerun()
+
+# --- 跨版本查詢 ---
+queries = {
+    "event": "Event ID 出現在哪些版本",
+    "uuid": "UUID 在各版本的位置",
+    "tab": "Tab Index 變化 (依名稱)",
+    "param": "Parameter 在各版本的值",
+}
+
+with st.container(border=True):
+    c1, c2 = st.columns([1, 2])
+    with c1:
+        query_type = st.radio("查詢類型", options=list(queries.keys()), format_func=lambda x: queries[x])
+    with c2:
+        placeholder = {"event": "e.g. Home_Click_Club", "uuid": "e.g. 40000001", "tab": "e.g. 社團", "param": "e.g. stateTabIndex"}[query_type]
+        keyword = st.text_input("查詢內容", placeholder=placeholder)
+        parent_uuid = "20000001"
+        if query_type == "tab":
+            parent_uuid = st.text_input("父節點 UUID", value="20000001")
+
+if keyword:
+    start = time.perf_counter()
+    if query_type == "event": rows = versions_with_event(keyword)
+    elif query_type == "uuid": rows = versions_with_uuid(keyword)
+    elif query_type == "tab": rows = tab_index_history(keyword, parent_uuid=parent_uuid)
+    else: rows = param_history(keyword)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if not rows:
+        st.info(f"查無結果 ({elapsed_ms:.1f} ms)")
+    else:
+        st.success(f"找到 {len(rows)} 筆 ({elapsed_ms:.1f} ms)")
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True, height=500)
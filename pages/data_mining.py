@@ -12,7 +12,8 @@ try:
 except:
     pass
 
-from bp_data import render_global_sidebar, get_blueprint_data, get_node_info
+from bp_data import render_global_sidebar, get_blueprint_data, get_derived, iter_node_records, filter_node_records
+from bp_export import export_file, available_formats, EXPORT_FORMATS
 
 st.set_page_config(page_title="埋點管理", layout="wide")
 render_global_sidebar()
@@ -25,48 +26,53 @@ if not blueprint_data:
     st.warning("⚠️ 請先在左側上傳 Blueprint。")
     st.stop()
 
-# 收集節點
-all_nodes = []
-def collect_nodes(node, path=""):
-    info = get_node_info(node)
-    current_path = f"{path} > {info['label']}" if path else info['label']
-    if info['name'] not in ["Unknown"]:
-        all_nodes.append({
-            "Path": current_path,
-            "Component": info['name'],
-            "Title": info['title'],
-            "Event ID": info['eventId'],
-            "UUID": info['uuid'],
-            "Has ID": bool(info['eventId'])
-        })
-    for sub in node.get('subComponents', []) + node.get('pages', []):
-        collect_nodes(sub, current_path)
+# 收集節點 (換檔後才重新走訪，篩選時直接取用快取)
+all_nodes = get_derived('data_mining_nodes', lambda data: list(iter_node_records(data)))
+TABLE_COLUMNS = ["Path", "Component", "Title", "Event ID", "UUID", "Has ID"]
 
-collect_nodes(blueprint_data)
-df = pd.DataFrame(all_nodes)
+# 篩選區 (fragment：調整篩選只重跑此區塊)
+@st.fragment
+def render_node_table():
+    # 控制列
+    with st.container(border=True):
+        c1, c2, c3 = st.columns([1, 1, 2])
+        with c1:
+            filter_type = st.multiselect("篩選類型", options=list(dict.fromkeys(r['Component'] for r in all_nodes)))
+        with c2:
+            filter_status = st.radio("篩選狀態", ["全部", "有埋點", "無埋點"], horizontal=True)
+        with c3:
+            compare_json = st.text_area("📋 (選填) 貼上 Event JSON", height=68)
 
-# 控制列
-with st.container(border=True):
-    c1, c2, c3 = st.columns([1, 1, 2])
-    with c1:
-        filter_type = st.multiselect("篩選類型", options=df['Component'].unique())
-    with c2:
-        filter_status = st.radio("篩選狀態", ["全部", "有埋點", "無埋點"], horizontal=True)
-    with c3:
-        compare_json = st.text_area("📋 (選填) 貼上 Event JSON", height=68)
+    ref_names = None
+    if compare_json:
+        try:
+            ref_events = json.loads(compare_json)
+            ref_names = set(e.get('name') for e in ref_events)
+            st.success("JSON 比對成功")
+        except:
+            ref_names = None
+            st.error("JSON 格式錯誤")
 
-# 篩選邏輯
-if filter_type: df = df[df['Component'].isin(filter_type)]
-if filter_status == "有埋點": df = df[df['Has ID'] == True]
-elif filter_status == "無埋點": df = df[df['Has ID'] == False]
+    # 篩選邏輯 (與匯出共用 filter_node_records)
+    columns = TABLE_COLUMNS + (["Sync"] if ref_names is not None else [])
+    df = pd.DataFrame(filter_node_records(all_nodes, filter_type, filter_status, ref_names), columns=columns)
+    st.data_editor(df, use_container_width=True, hide_index=True, height=600)
 
-if compare_json:
-    try:
-        ref_events = json.loads(compare_json)
-        ref_names = set(e.get('name') for e in ref_events)
-        df['Sync'] = df.apply(lambda r: "🟢" if r['Event ID'] in ref_names else ("🔴" if r['Event ID'] else "⚪"), axis=1)
-        st.success("JSON 比對成功")
-    except:
-        st.error("JSON 格式錯誤")
+    # 匯出：點擊下載時才以相同的篩選條件串流寫檔，不經過上方的 DataFrame
+    export_columns = [c for c in columns if c != "Has ID"]
+    with st.container(border=True):
+        c1, c2 = st.columns([1, 3])
+        with c1:
+            fmt = st.selectbox("匯出格式", available_formats(), format_func=lambda x: EXPORT_FORMATS[x]['label'], key="dm_export_fmt")
+        with c2:
+            st.write("")
+            st.download_button(
+                f"⬇️ 下載 {EXPORT_FORMATS[fmt]['label']}",
+                data=lambda: export_file(filter_node_records(all_nodes, filter_type, filter_status, ref_names), export_columns, fmt),
+                file_name=f"event_nodes.{EXPORT_FORMATS[fmt]['ext']}",
+                mime=EXPORT_FORMATS[fmt]['mime'],
+                on_click="ignore",
+                use_container_width=True
+            )
 
-st.data_editor(df, use_container_width=True, hide_index=True, height=600)
\ No newline at end of file
+render_node_table()
@@ -1,6 +1,8 @@
 import streamlit as st
 import sys
 import os
+import hashlib
+import pandas as pd
 
 try:
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -10,7 +12,8 @@ try:
 except:
     pass
 
-from bp_data import render_global_sidebar, get_blueprint_data, parse_blueprint_for_deeplink, find_tab_index_by_name
+from bp_data import render_global_sidebar, get_blueprint_data, get_derived, parse_blueprint_for_deeplink, find_tab_index_by_name, resolve_deep_links, iter_csv_urls, DEEPLINK_BASE_URL, DEEPLINK_RESOLVED_COLUMNS
+from bp_export import write_rows, make_export_path, DownloadFile
 
 st.set_page_config(page_title="Deep Link Generator", page_icon="🔗", layout="wide")
 render_global_sidebar()
@@ -21,8 +24,8 @@ blueprint_data = get_blueprint_data()
 if not blueprint_data:
     st.warning("⚠️ 請先上傳 Blueprint 以啟用智慧搜尋功能。")
 
-# 解析目前藍圖
-known_pages, param_defs = parse_blueprint_for_deeplink(blueprint_data)
+# 解析目前藍圖 (換檔後才重算，輸入參數時不會重新走訪藍圖)
+known_pages, param_defs = get_derived('deeplink_defs', parse_blueprint_for_deeplink)
 
 # 初始化 State
 if 'dl_uuids' not in st.session_state: st.session_state['dl_uuids'] = ["20000001"]
@@ -41,16 +44,20 @@ presets = {
     "Stock": "個股頁 (Stock)",
 }
 
-# 讓按鈕排成一列 (Pills or Radio horizontal)
-scenario = st.radio("選擇情境", options=list(presets.keys()), format_func=lambda x: presets[x], horizontal=True, label_visibility="collapsed")
+def _set_params(new_params):
+    # 參數輸入框直接綁定 session_state，切換情境時一併重設
+    for key in st.session_state['dl_params']:
+        st.session_state.pop(f"in_{key}", None)
+    st.session_state['dl_params'] = new_params
+    for key, value in new_params.items():
+        st.session_state[f"in_{key}"] = value
 
 # === 智慧邏輯執行區 ===
-# 只有當情境改變時，才觸發更新
-if 'last_scenario' not in st.session_state: st.session_state['last_scenario'] = "Custom"
+# 以 on_change callback 執行，只有情境改變時才觸發，且不需要額外 st.rerun()
+def _apply_scenario():
+    scenario = st.session_state['dl_scenario']
+    blueprint_data = get_blueprint_data()
 
-if scenario != st.session_state['last_scenario']:
-    st.session_state['last_scenario'] = scenario
-    
     # 預設重置
     new_params = {"int-main_tab_index": "0"}
     new_uuids = ["20000001"]
@@ -105,63 +112,148 @@ if scenario != st.session_state['last_scenario']:
         new_params["string-stateCommKey"] = "2330" # 預設台積電
 
     st.session_state['dl_uuids'] = new_uuids
-    st.session_state['dl_params'] = new_params
-    st.rerun()
+    _set_params(new_params)
 
-# --- 2. 介面顯示 ---
-col1, col2 = st.columns(2)
+# 讓按鈕排成一列 (Pills or Radio horizontal)
+st.radio("選擇情境", options=list(presets.keys()), format_func=lambda x: presets[x], horizontal=True, label_visibility="collapsed", key="dl_scenario", on_change=_apply_scenario)
 
-with col1:
-    with st.container(border=True):
-        st.subheader("2. 頁面堆疊 (UUIDs)")
-        for i, u in enumerate(st.session_state['dl_uuids']):
-            p_name = known_pages.get(u, {}).get('name', 'Unknown')
-            st.code(f"{i+1}. {p_name}\n({u})")
-        
-        all_opts = {k: v['name'] for k, v in known_pages.items() if k != "20000001"}
-        add_u = st.selectbox("新增頁面", [""] + list(all_opts.keys()), format_func=lambda x: all_opts.get(x, "") if x else "選擇...")
-        if st.button("➕ 加入堆疊") and add_u:
-            st.session_state['dl_uuids'].append(add_u)
-            st.rerun()
+def _add_uuid():
+    add_u = st.session_state.get('dl_add_uuid')
+    if add_u: st.session_state['dl_uuids'].append(add_u)
+
+def _sync_param(key):
+    st.session_state['dl_params'][key] = st.session_state[f"in_{key}"]
+
+def _param_input(label, key):
+    widget_key = f"in_{key}"
+    if widget_key not in st.session_state:
+        st.session_state[widget_key] = st.session_state['dl_params'][key]
+    # text_input 只在 Enter / 失焦時送出，等同於輸入防抖；送出後只重跑本區塊
+    st.text_input(label, key=widget_key, on_change=_sync_param, args=(key,))
+
+# --- 2. URL 組裝區 (fragment：編輯參數只重跑此區塊，不重跑整頁) ---
+@st.fragment
+def render_url_builder():
+    col1, col2 = st.columns(2)
+
+    with col1:
+        with st.container(border=True):
+            st.subheader("2. 頁面堆疊 (UUIDs)")
+            for i, u in enumerate(st.session_state['dl_uuids']):
+                p_name = known_pages.get(u, {}).get('name', 'Unknown')
+                st.code(f"{i+1}. {p_name}\n({u})")
+            
+            all_opts = {k: v['name'] for k, v in known_pages.items() if k != "20000001"}
+            st.selectbox("新增頁面", [""] + list(all_opts.keys()), format_func=lambda x: all_opts.get(x, "") if x else "選擇...", key="dl_add_uuid")
+            st.button("➕ 加入堆疊", on_click=_add_uuid)
+
+    with col2:
+        with st.container(border=True):
+            st.subheader("3. 參數設定")
+            
+            # 優先顯示與目前情境相關的參數
+            priority_keys = ["int-main_tab_index", "int-boardIndex", "long-stateBoardId", "int-contentSectionIndex", "string-stateCommKey", "string-stateDetailPageParam", "long-stateArticleId"]
+            
+            # 顯示 Main Tab
+            if 'int-main_tab_index' not in st.session_state['dl_params']:
+                st.session_state['dl_params']['int-main_tab_index'] = "0"
+            _param_input("Main Tab Index", 'int-main_tab_index')
+
+            # 顯示其他活躍參數
+            current_keys = list(st.session_state['dl_params'].keys())
+            for key in priority_keys:
+                if key in current_keys and key != "int-main_tab_index":
+                    label = param_defs.get(key, {}).get('label', key)
+                    _param_input(f"{label} ({key})", key)
+            
+            # 顯示剩餘參數
+            for key in current_keys:
+                if key not in priority_keys:
+                    _param_input(key, key)
+
+    # --- 3. 結果 ---
+    st.markdown("---")
+    st.subheader("🚀 Result Link")
+    uuids_str = ",".join(st.session_state['dl_uuids'])
+    params_list = [f"{k}={v}" for k, v in st.session_state['dl_params'].items() if v]
+    final_url = f"{DEEPLINK_BASE_URL}?uuids={uuids_str}"
+    if params_list:
+        final_url += "&" + "&".join(params_list)
+
+    st.code(final_url)
+
+render_url_builder()
+
+# --- 4. 反解析 (批次) ---
+RESOLVER_PREVIEW_ROWS = 1000
+
+def _resolve_to_file(lines, only_issues, workers):
+    """
+    逐 chunk 解析並直接寫入暫存 CSV，記憶體中只保留統計與前 RESOLVER_PREVIEW_ROWS 筆預覽。
+    回傳 {"path", "total", "invalid", "rows", "preview"}。
+    """
+    result = {"total": 0, "invalid": 0, "rows": 0, "preview": []}
+
+    def _rows():
+        for chunk in resolve_deep_links(lines, known_pages, param_defs, workers=workers):
+            for row in chunk:
+                result['total'] += 1
+                if not row['Valid']: result['invalid'] += 1
+                elif only_issues: continue
+                result['rows'] += 1
+                if len(result['preview']) < RESOLVER_PREVIEW_ROWS: result['preview'].append(row)
+                yield row
+
+    fd, result['path'] = make_export_path("deep_link_resolved_", ".csv")
+    with os.fdopen(fd, 'wb') as fh:
+        write_rows(_rows(), DEEPLINK_RESOLVED_COLUMNS, "csv", fh)
+    return result
+
+@st.fragment
+def render_reverse_resolver():
+    st.markdown("---")
+    st.subheader("🔍 Deep Link 反解析")
+    st.caption("上傳 Deep Link Log (txt 一行一個連結；csv 取每列中的連結欄位)，對照目前藍圖還原頁面名稱與參數意義，並標記未知 UUID 與超出範圍的索引。")
 
-with col2:
     with st.container(border=True):
-        st.subheader("3. 參數設定")
-        
-        # 優先顯示與目前情境相關的參數
-        priority_keys = ["int-main_tab_index", "int-boardIndex", "long-stateBoardId", "int-contentSectionIndex", "string-stateCommKey", "string-stateDetailPageParam", "long-stateArticleId"]
-        
-        # 顯示 Main Tab
-        val = st.text_input("Main Tab Index", value=st.session_state['dl_params'].get('int-main_tab_index', "0"), key="in_main_tab")
-        if val != st.session_state['dl_params'].get('int-main_tab_index'):
-            st.session_state['dl_params']['int-main_tab_index'] = val
-            st.rerun()
-
-        # 顯示其他活躍參數
-        current_keys = list(st.session_state['dl_params'].keys())
-        for key in priority_keys:
-            if key in current_keys and key != "int-main_tab_index":
-                label = param_defs.get(key, {}).get('label', key)
-                val = st.text_input(f"{label} ({key})", value=st.session_state['dl_params'][key], key=f"in_{key}")
-                if val != st.session_state['dl_params'][key]:
-                    st.session_state['dl_params'][key] = val
-                    st.rerun()
-        
-        # 顯示剩餘參數
-        for key in current_keys:
-            if key not in priority_keys:
-                 val = st.text_input(key, value=st.session_state['dl_params'][key], key=f"in_{key}")
-                 if val != st.session_state['dl_params'][key]:
-                    st.session_state['dl_params'][key] = val
-                    st.rerun()
-
-# --- 3. 結果 ---
-st.markdown("---")
-st.subheader("🚀 Result Link")
-uuids_str = ",".join(st.session_state['dl_uuids'])
-params_list = [f"{k}={v}" for k, v in st.session_state['dl_params'].items() if v]
-final_url = f"https://www.cmoney.tw/app/?uuids={uuids_str}"
-if params_list:
-    final_url += "&" + "&".join(params_list)
-
-st.code(final_url)
\ No newline at end of file
+        c1, c2 = st.columns([3, 1])
+        with c1:
+            log_file = st.file_uploader("Deep Link Log (txt/csv)", type=['txt', 'csv', 'log'], key="dl_log_uploader")
+            pasted = st.text_area("或直接貼上連結", height=100, key="dl_log_text")
+        with c2:
+            only_issues = st.checkbox("只顯示異常", value=False)
+            workers = st.number_input("平行 Process 數", min_value=1, max_value=os.cpu_count() or 1, value=1)
+
+        cached = st.session_state.get('dl_resolved')
+        if not (log_file or pasted):
+            # 輸入清空時一併刪除上次的結果檔
+            if cached:
+                if os.path.exists(cached['path']): os.remove(cached['path'])
+                del st.session_state['dl_resolved']
+        else:
+            # 同一份輸入 + 同一版藍圖只解析一次，其他 rerun 直接使用上次寫好的檔案
+            # (檔案過舊被定期清除時重新解析)
+            source_id = log_file.file_id if log_file else hashlib.sha1(pasted.encode('utf-8')).hexdigest()
+            cache_key = (source_id, only_issues, st.session_state.get('blueprint_rev', 0))
+            if cached is None or cached['key'] != cache_key or not os.path.exists(cached['path']):
+                if cached and os.path.exists(cached['path']): os.remove(cached['path'])
+                if log_file:
+                    log_file.seek(0)
+                    lines = (line.decode('utf-8-sig', errors='ignore') for line in log_file)
+                    if log_file.name.lower().endswith('.csv'): lines = iter_csv_urls(lines)
+                else:
+                    lines = pasted.splitlines()
+                with st.spinner("解析中..."):
+                    cached = _resolve_to_file(lines, only_issues, int(workers))
+                cached['key'] = cache_key
+                st.session_state['dl_resolved'] = cached
+
+            if cached['total']:
+                st.success(f"解析 {cached['total']} 筆連結，其中 {cached['invalid']} 筆異常")
+                if cached['rows'] > RESOLVER_PREVIEW_ROWS:
+                    st.caption(f"僅預覽前 {RESOLVER_PREVIEW_ROWS} 筆，完整 {cached['rows']} 筆請下載 CSV。")
+                st.dataframe(pd.DataFrame(cached['preview'], columns=DEEPLINK_RESOLVED_COLUMNS), use_container_width=True, hide_index=True, height=400)
+                path = cached['path']
+                st.download_button("⬇️ 下載 CSV", data=lambda: DownloadFile(path), file_name="deep_link_resolved.csv", mime="text/csv", on_click="ignore")
+
+render_reverse_resolver()